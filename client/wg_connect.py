@@ -11,11 +11,20 @@ import getpass
 import subprocess
 import argparse
 import json
+import re
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 
 API_BASE_URL = "https://localhost/api"
 CONFIG_DIR = Path.home() / ".config" / "vpn-connect"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+ENDPOINT_CACHE_FILE = CONFIG_DIR / "endpoints.json"
+ENDPOINT_CACHE_TTL = 300
+PROBE_DEADLINE = 2.0
+HANDSHAKE_TIMEOUT = 10
+TUNNEL_CONFIG = Path("/tmp/wg0.conf")
 
 class Colors:
     GREEN = '\033[92m'
@@ -93,7 +102,7 @@ def authenticate(http_session, server_url, username, password):
         print_info("Make sure the VPN server is running and accessible")
         return False
 
-    def generate_config(http_session, server_url):
+def generate_config(http_session, server_url):
     """Generate WireGuard configuration from server"""
     print_info("Generating VPN configuration...")
 
@@ -115,28 +124,186 @@ def authenticate(http_session, server_url, username, password):
         print_error(f"Connection error: {e}")
         return None
 
+def probe_https(api_url, timeout):
+    """Round-trip time in ms of the health endpoint, or None"""
+    start = time.perf_counter()
+    try:
+        response = requests.get(f"{api_url}/health", timeout=timeout, verify=False)
+    except requests.exceptions.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    return (time.perf_counter() - start) * 1000
+
+def probe_udp(endpoint, timeout):
+    """Best-effort UDP check: WireGuard stays silent, so only an ICMP
+    port-unreachable (ConnectionRefusedError) or bad address fails"""
+    try:
+        host, _, port = endpoint.rpartition(':')
+        family, _, _, _, address = socket.getaddrinfo(
+            host.strip('[]'), int(port), type=socket.SOCK_DGRAM
+        )[0]
+    except (OSError, ValueError):
+        return False
+
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(address)
+            sock.send(b'\x00')
+            sock.recv(64)
+        except ConnectionRefusedError:
+            return False
+        except socket.timeout:
+            return True
+        except OSError:
+            return False
+    return True
+
+def probe_endpoint(endpoint, timeout):
+    """Probe one published endpoint"""
+    api_url = f"{endpoint['url']}/api"
+    rtt = probe_https(api_url, timeout)
+    udp_ok = probe_udp(endpoint['wireguard'], min(timeout, 0.5)) if rtt is not None else False
+    return {**endpoint, 'api_url': api_url, 'rtt_ms': rtt,
+            'healthy': rtt is not None and udp_ok}
+
+def rank_endpoints(results):
+    """Healthy endpoints first, fastest first"""
+    return sorted(results, key=lambda r: (
+        not r['healthy'], r['rtt_ms'] if r['rtt_ms'] is not None else float('inf')
+    ))
+
+def rewrite_endpoint(config, endpoint):
+    """Point the config's [Peer] Endpoint at the server that was probed"""
+    return re.sub(r'^Endpoint\s*=.*$', f"Endpoint = {endpoint}", config, flags=re.M)
+
+def probe_endpoints(endpoints, deadline=PROBE_DEADLINE):
+    """Probe all endpoints concurrently within a shared deadline"""
+    if len(endpoints) == 1:
+        # Nothing to choose between; the handshake check decides instead
+        return [{**endpoints[0], 'api_url': f"{endpoints[0]['url']}/api",
+                 'rtt_ms': None, 'healthy': True}]
+
+    executor = ThreadPoolExecutor(max_workers=min(16, len(endpoints)))
+    futures = {executor.submit(probe_endpoint, ep, deadline): ep for ep in endpoints}
+    done, _ = wait(futures, timeout=deadline)
+    executor.shutdown(wait=False)
+
+    results = []
+    for future, endpoint in futures.items():
+        if future in done and future.exception() is None:
+            results.append(future.result())
+        else:
+            results.append({**endpoint, 'api_url': f"{endpoint['url']}/api",
+                            'rtt_ms': None, 'healthy': False})
+    return rank_endpoints(results)
+
+def load_endpoint_cache(server_url):
+    """Cached probe results for this server, if still fresh"""
+    if not ENDPOINT_CACHE_FILE.exists():
+        return None
+    try:
+        with open(ENDPOINT_CACHE_FILE, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get('server_url') != server_url:
+        return None
+    if time.time() - cache.get('probed_at', 0) > ENDPOINT_CACHE_TTL:
+        return None
+    return cache['results']
+
+def save_endpoint_cache(server_url, results):
+    """Persist probe results so the next run can skip probing"""
+    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    with open(ENDPOINT_CACHE_FILE, 'w') as f:
+        json.dump({'server_url': server_url, 'probed_at': time.time(),
+                   'results': results}, f)
+
+def select_endpoints(http_session, server_url, refresh=False):
+    """Return candidate servers, fastest healthy one first"""
+    if not refresh:
+        cached = load_endpoint_cache(server_url)
+        if cached:
+            return cached
+
+    try:
+        response = http_session.get(f"{server_url}/endpoints", timeout=10)
+        endpoints = response.json().get('endpoints', []) if response.status_code == 200 else []
+    except (requests.exceptions.RequestException, ValueError):
+        endpoints = []
+
+    if not endpoints:
+        # Server does not publish a list; use the configured URL as-is
+        return [{'name': 'configured', 'api_url': server_url,
+                 'rtt_ms': None, 'healthy': True}]
+
+    if len(endpoints) > 1:
+        print_info(f"Probing {len(endpoints)} servers...")
+    results = probe_endpoints(endpoints)
+    save_endpoint_cache(server_url, results)
+    return results
+
+def mark_endpoint_failed(server_url, name):
+    """Demote an endpoint in the cache after a failed handshake"""
+    cached = load_endpoint_cache(server_url)
+    if not cached:
+        return
+    results = [{**r, 'healthy': False} if r['name'] == name else r for r in cached]
+    save_endpoint_cache(server_url, rank_endpoints(results))
+
+def wait_for_handshake(timeout=HANDSHAKE_TIMEOUT):
+    """Wait until wg0 has completed a handshake with the server"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        result = subprocess.run(['wg', 'show', 'wg0', 'latest-handshakes'],
+                                capture_output=True, text=True)
+        for line in result.stdout.splitlines():
+            fields = line.split()
+            if len(fields) == 2 and fields[1] != '0':
+                return True
+        time.sleep(0.5)
+    return False
+
 def connect_vpn(config):
-    """Connect to VPN using WireGuard"""
+    """Connect to VPN using WireGuard.
+
+    The config file is kept after a successful `wg-quick up`, since
+    `wg-quick down` needs it to tear the tunnel down on failover; call
+    remove_tunnel_config() once the tunnel is confirmed.
+    """
     print_info("Establishing VPN connection...")
 
     # Save config to temporary file
-    config_path = Path("/tmp/wg0.conf")
-    with open(config_path, 'w') as f:
+    with open(TUNNEL_CONFIG, 'w') as f:
         f.write(config)
 
     try:
         # Bring up WireGuard interface
-        subprocess.run(['wg-quick', 'up', str(config_path)], check=True)
+        subprocess.run(['wg-quick', 'up', str(TUNNEL_CONFIG)], check=True)
         print_success("VPN connected successfully!")
         print_info("Only YouTube is accessible through this VPN")
         return True
     except subprocess.CalledProcessError as e:
         print_error(f"Failed to establish VPN connection: {e}")
+        remove_tunnel_config()
+        return False
+
+def remove_tunnel_config():
+    """Delete the temporary config (it holds the private key)"""
+    if TUNNEL_CONFIG.exists():
+        TUNNEL_CONFIG.unlink()
+
+def drop_tunnel():
+    """Tear down a tunnel brought up by connect_vpn(); returns success"""
+    result = subprocess.run(['wg-quick', 'down', str(TUNNEL_CONFIG)],
+                            capture_output=True, text=True)
+    remove_tunnel_config()
+    if result.returncode != 0:
+        print_error(f"Failed to bring down wg0: {result.stderr.strip()}")
         return False
-    finally:
-        # Clean up config file
-        if config_path.exists():
-            config_path.unlink()
+    return True
 
 def disconnect_vpn():
     """Disconnect from VPN"""
@@ -177,6 +344,8 @@ def main():
     parser.add_argument('--disconnect', action='store_true', help='Disconnect from VPN')
     parser.add_argument('--status', action='store_true', help='Show VPN status')
     parser.add_argument('--server', help='VPN server URL')
+    parser.add_argument('--refresh-endpoints', action='store_true',
+                        help='Re-probe servers instead of using cached results')
 
     args = parser.parse_args()
 
@@ -221,21 +390,61 @@ def main():
     # Get password
     password = getpass.getpass("Password: ")
 
-    # Authenticate
-    is_authenticated = authenticate(http_session, server_url, args.username, password)
-    if not is_authenticated:
+    candidates = select_endpoints(http_session, server_url, args.refresh_endpoints)
+    for candidate in candidates:
+        if candidate['rtt_ms'] is not None:
+            print_info(f"  {candidate['name']}: {candidate['rtt_ms']:.0f} ms")
+        elif not candidate['healthy']:
+            print_warning(f"  {candidate['name']}: unreachable")
+
+    healthy = [c for c in candidates if c['healthy']]
+    if not healthy:
+        print_error("No reachable VPN server")
+        print_info("Retry with --refresh-endpoints")
         sys.exit(1)
 
-    # Generate config
-    vpn_config = generate_config(http_session, server_url)
-    if not vpn_config:
-        sys.exit(1)
-
-    # Connect
-    if connect_vpn(vpn_config):
-        print_info("Press Ctrl+C to disconnect, or run: wg-connect --disconnect")
-    else:
-        sys.exit(1)
+    for candidate in healthy:
+        api_url = candidate['api_url']
+        if candidate['name'] != 'configured':
+            print_info(f"Using server {candidate['name']}")
+
+        # Authenticate
+        is_authenticated = authenticate(http_session, api_url, args.username, password)
+        if not is_authenticated:
+            sys.exit(1)
+
+        # Generate config
+        vpn_config = generate_config(http_session, api_url)
+        if not vpn_config:
+            sys.exit(1)
+        if candidate.get('wireguard'):
+            # Connect to the address that was probed, not whatever the region configured
+            vpn_config = rewrite_endpoint(vpn_config, candidate['wireguard'])
+
+        # Connect
+        if not connect_vpn(vpn_config):
+            sys.exit(1)
+
+        try:
+            handshake = wait_for_handshake()
+        except KeyboardInterrupt:
+            # Tunnel stays up (wg-connect --disconnect), but not the key on disk
+            remove_tunnel_config()
+            raise
+        if handshake:
+            remove_tunnel_config()
+            print_info("Press Ctrl+C to disconnect, or run: wg-connect --disconnect")
+            return
+
+        # No handshake: fail over to the next fastest server
+        print_warning(f"No handshake with {candidate['name']}, trying next server")
+        mark_endpoint_failed(server_url, candidate['name'])
+        if not drop_tunnel():
+            # wg0 is still up, so the next `wg-quick up` would fail too
+            sys.exit(1)
+
+    print_error("Could not complete a handshake with any VPN server")
+    sys.exit(1)
 
 if __name__ == '__main__':
     try:
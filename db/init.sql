@@ -28,7 +28,20 @@ CREATE TABLE IF NOT EXISTS active_connections (
     bytes_sent BIGINT DEFAULT 0,
     bytes_received BIGINT DEFAULT 0,
     FOREIGN KEY (user_id) REFERENCES vpn_users(id) ON DELETE CASCADE,
-    INDEX idx_user_id (user_id)
+    INDEX idx_user_id (user_id),
+    UNIQUE KEY uniq_assigned_ip (assigned_ip)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Address blocks leased by webui nodes (rows seeded by the webui on startup)
+CREATE TABLE IF NOT EXISTS ip_pool_blocks (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    block_start INT UNSIGNED NOT NULL,
+    block_size INT NOT NULL,
+    owner VARCHAR(255) NULL,
+    claim_token CHAR(32) NULL,
+    lease_expires TIMESTAMP NULL,
+    UNIQUE KEY uniq_block_start (block_start),
+    UNIQUE KEY uniq_claim_token (claim_token)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 -- Connection logs
@@ -0,0 +1,27 @@
+-- Migration 001: IP pool leasing
+-- For databases created before ip_pool_blocks existed (db/init.sql only runs
+-- on a fresh db_data volume). The webui also creates the table on startup;
+-- the unique key on assigned_ip has to be added here.
+
+USE vpn_users;
+
+CREATE TABLE IF NOT EXISTS ip_pool_blocks (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    block_start INT UNSIGNED NOT NULL,
+    block_size INT NOT NULL,
+    owner VARCHAR(255) NULL,
+    claim_token CHAR(32) NULL,
+    lease_expires TIMESTAMP NULL,
+    UNIQUE KEY uniq_block_start (block_start),
+    UNIQUE KEY uniq_claim_token (claim_token)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Fails if the old allocator already handed out an address twice; list
+-- duplicates with:
+--   SELECT assigned_ip, COUNT(*) FROM active_connections
+--   GROUP BY assigned_ip HAVING COUNT(*) > 1;
+-- and delete the stale rows first.
+ALTER TABLE active_connections
+    ADD UNIQUE KEY uniq_assigned_ip (assigned_ip);
+
+SELECT 'Migration 001 applied' AS status;
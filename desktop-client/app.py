@@ -1,31 +1,48 @@
 import threading
 import tkinter as tk
+from collections import deque
 from tkinter import messagebox
 
 import urllib3
 
-from connector import connect_vpn, disconnect_vpn, ensure_privileges, get_status
+from connector import connect_vpn, disconnect_vpn, ensure_privileges, get_status, wait_for_handshake
+from endpoints import EndpointSelector, rewrite_endpoint
+from monitor import TunnelMonitor, format_age, format_rate
 from vpn_api import VPNApiClient
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
+CHART_POINTS = 60
+CHART_HEIGHT = 70
+SAMPLE_INTERVALS = ("0.5", "1", "2", "5")
+
+
 class VPNDesktopApp:
     def __init__(self, root):
         self.root = root
         self.root.title("VPN Cloud Desktop Client")
-        self.root.geometry("520x420")
+        self.root.geometry("520x560")
 
         self.api_client = None
         self.latest_config = None
+        self.selector = EndpointSelector(verify_tls=False)
 
         self.server_var = tk.StringVar(value="https://localhost")
         self.user_var = tk.StringVar()
         self.pass_var = tk.StringVar()
         self.status_var = tk.StringVar(value="Ready")
+        self.traffic_var = tk.StringVar(value="Tunnel down")
+        self.interval_var = tk.StringVar(value="1")
+        self.history = deque(maxlen=CHART_POINTS)
+        self.closed = False
 
         self._build_ui()
 
+        self.monitor = TunnelMonitor(self._on_sample, interval=float(self.interval_var.get()))
+        self.monitor.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
     def _build_ui(self):
         frame = tk.Frame(self.root, padx=16, pady=16)
         frame.pack(fill="both", expand=True)
@@ -46,6 +63,16 @@ class VPNDesktopApp:
         tk.Button(btn_row, text="Disconnect", command=self.disconnect).pack(side="left", padx=(0, 8))
         tk.Button(btn_row, text="Refresh Status", command=self.refresh_status).pack(side="left")
 
+        telemetry = tk.Frame(frame)
+        telemetry.pack(fill="x", pady=(4, 0))
+        tk.Label(telemetry, textvariable=self.traffic_var, anchor="w").pack(side="left", fill="x", expand=True)
+        tk.OptionMenu(telemetry, self.interval_var, *SAMPLE_INTERVALS,
+                      command=self._change_interval).pack(side="right")
+        tk.Label(telemetry, text="Sample (s)").pack(side="right")
+
+        self.chart = tk.Canvas(frame, height=CHART_HEIGHT, bg="white", highlightthickness=1)
+        self.chart.pack(fill="x", pady=(4, 0))
+
         self.output = tk.Text(frame, height=12, wrap="word")
         self.output.pack(fill="both", expand=True, pady=(8, 0))
 
@@ -59,6 +86,57 @@ class VPNDesktopApp:
     def set_status(self, value):
         self.status_var.set(value)
 
+    def _change_interval(self, value):
+        self.monitor.set_interval(float(value))
+
+    def _on_sample(self, sample):
+        # Called from the monitor thread; Tk widgets may only be touched on the Tk thread
+        if self.closed:
+            return
+        try:
+            self.root.after(0, self._show_sample, sample)
+        except (tk.TclError, RuntimeError):
+            # Window destroyed between the check and the call
+            pass
+
+    def _show_sample(self, sample):
+        if not sample["connected"]:
+            self.history.clear()
+            self.traffic_var.set("Tunnel down")
+            self.chart.delete("all")
+            return
+
+        self.history.append((sample["rx_rate"], sample["tx_rate"]))
+        self.traffic_var.set(
+            f"RX {format_rate(sample['rx_rate'])}   TX {format_rate(sample['tx_rate'])}   "
+            f"Handshake {format_age(sample['handshake_age'])}"
+        )
+        self._draw_chart()
+
+    def _draw_chart(self):
+        self.chart.delete("all")
+        if len(self.history) < 2:
+            return
+
+        width = self.chart.winfo_width()
+        peak = max(max(rx, tx) for rx, tx in self.history) or 1
+        step = width / (CHART_POINTS - 1)
+        offset = CHART_POINTS - len(self.history)
+
+        for index, color in ((0, "#2e7d32"), (1, "#1565c0")):
+            points = []
+            for i, rates in enumerate(self.history):
+                points.append((offset + i) * step)
+                points.append(CHART_HEIGHT - 4 - rates[index] / peak * (CHART_HEIGHT - 8))
+            self.chart.create_line(*points, fill=color, width=2)
+
+        self.chart.create_text(4, 4, anchor="nw", fill="#555", text=f"peak {format_rate(peak)}")
+
+    def close(self):
+        self.closed = True
+        self.monitor.stop(timeout=2)
+        self.root.destroy()
+
     def _run_async(self, fn):
         thread = threading.Thread(target=fn, daemon=True)
         thread.start()
@@ -76,18 +154,44 @@ class VPNDesktopApp:
                 if not server or not username or not password:
                     raise RuntimeError("Server URL, username, and password are required")
 
-                self.api_client = VPNApiClient(server, verify_tls=False)
-                self.log(f"Authenticating user {username}...")
-                self.api_client.login(username, password)
-                self.log("Login successful")
-
-                payload = self.api_client.generate_config()
-                self.latest_config = payload["config"]
-                self.log(f"Config generated, assigned IP: {payload.get('assigned_ip', '-')}")
-
-                result = connect_vpn(self.latest_config)
-                self.log(result)
-                self.set_status("Connected")
+                self.log("Probing servers...")
+                candidates = self.selector.rank(VPNApiClient(server, verify_tls=False))
+                for candidate in candidates:
+                    if candidate["rtt_ms"] is not None:
+                        self.log(f"  {candidate['name']}: {candidate['rtt_ms']:.0f} ms")
+                    elif not candidate["healthy"]:
+                        self.log(f"  {candidate['name']}: unreachable")
+
+                healthy = [c for c in candidates if c["healthy"]]
+                if not healthy:
+                    raise RuntimeError("No reachable VPN server")
+
+                for candidate in healthy:
+                    self.set_status(f"Connecting to {candidate['name']}...")
+                    self.api_client = VPNApiClient(candidate["url"], verify_tls=False)
+                    self.log(f"Authenticating user {username} on {candidate['name']}...")
+                    self.api_client.login(username, password)
+                    self.log("Login successful")
+
+                    payload = self.api_client.generate_config()
+                    self.latest_config = payload["config"]
+                    if candidate.get("wireguard"):
+                        # Connect to the address that was probed, not whatever the region configured
+                        self.latest_config = rewrite_endpoint(self.latest_config, candidate["wireguard"])
+                    self.log(f"Config generated, assigned IP: {payload.get('assigned_ip', '-')}")
+
+                    result = connect_vpn(self.latest_config)
+                    self.log(result)
+                    if wait_for_handshake():
+                        self.set_status(f"Connected ({candidate['name']})")
+                        break
+
+                    # No handshake: fail over to the next fastest server
+                    self.log(f"No handshake with {candidate['name']}, trying next server")
+                    self.selector.mark_failed(server, candidate["name"])
+                    disconnect_vpn()
+                else:
+                    raise RuntimeError("Could not complete a handshake with any VPN server")
             except Exception as exc:
                 self.set_status("Error")
                 self.log(f"Error: {exc}")
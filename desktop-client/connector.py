@@ -2,8 +2,11 @@ import os
 import platform
 import subprocess
 import tempfile
+import time
 from pathlib import Path
 
+from monitor import read_wg_dump
+
 
 WINDOWS_WIREGUARD_EXE = r"C:\Program Files\WireGuard\wireguard.exe"
 
@@ -46,12 +49,15 @@ def connect_vpn(config_text: str):
         if not Path(WINDOWS_WIREGUARD_EXE).exists():
             raise RuntimeError("WireGuard is not installed. Install from https://www.wireguard.com/install/")
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".conf", mode="w", encoding="utf-8") as fp:
-            fp.write(config_text)
-            temp_conf = fp.name
-
         _run([WINDOWS_WIREGUARD_EXE, "/uninstalltunnelservice", "wg0"])
-        code, _, err = _run([WINDOWS_WIREGUARD_EXE, "/installtunnelservice", temp_conf])
+
+        # The tunnel is named after the file, so it must be wg0.conf for the
+        # monitor, the handshake check and disconnect to find it
+        conf_path = Path(tempfile.gettempdir()) / "vpn-cloud" / "wg0.conf"
+        conf_path.parent.mkdir(parents=True, exist_ok=True)
+        conf_path.write_text(config_text, encoding="utf-8")
+
+        code, _, err = _run([WINDOWS_WIREGUARD_EXE, "/installtunnelservice", str(conf_path)])
         if code != 0:
             raise RuntimeError(err or "Failed to connect on Windows")
         return "Connected (Windows)"
@@ -59,6 +65,17 @@ def connect_vpn(config_text: str):
     raise RuntimeError(f"Unsupported OS: {system}")
 
 
+def wait_for_handshake(timeout: float = 10.0, interface: str = "wg0"):
+    """Return True once the tunnel has completed a handshake."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        dump = read_wg_dump(interface)
+        if dump and dump[2] > 0:
+            return True
+        time.sleep(0.5)
+    return False
+
+
 def disconnect_vpn():
     system = platform.system()
 
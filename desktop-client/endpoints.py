@@ -0,0 +1,127 @@
+import re
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+
+
+def _split_host_port(endpoint: str):
+    host, _, port = endpoint.rpartition(":")
+    return host.strip("[]"), int(port)
+
+
+def probe_https(url: str, timeout: float, verify_tls: bool = False):
+    """Return the round-trip time in ms of GET /api/health, or None."""
+    start = time.perf_counter()
+    try:
+        response = requests.get(f"{url}/api/health", timeout=timeout, verify=verify_tls)
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    return (time.perf_counter() - start) * 1000
+
+
+def probe_udp(endpoint: str, timeout: float):
+    """Best-effort UDP reachability check of a WireGuard endpoint.
+
+    WireGuard never answers unauthenticated packets, so silence counts as
+    reachable; only a resolution failure or an ICMP port-unreachable
+    (surfaced as ConnectionRefusedError on a connected socket) fails.
+    """
+    try:
+        host, port = _split_host_port(endpoint)
+        family, _, _, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0]
+    except (OSError, ValueError):
+        return False
+
+    with socket.socket(family, socket.SOCK_DGRAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(address)
+            sock.send(b"\x00")
+            sock.recv(64)
+        except ConnectionRefusedError:
+            return False
+        except socket.timeout:
+            return True
+        except OSError:
+            return False
+    return True
+
+
+def probe_endpoint(endpoint: dict, timeout: float, verify_tls: bool = False):
+    rtt = probe_https(endpoint["url"], timeout, verify_tls)
+    udp_ok = probe_udp(endpoint["wireguard"], min(timeout, 0.5)) if rtt is not None else False
+    return {**endpoint, "rtt_ms": rtt, "healthy": rtt is not None and udp_ok}
+
+
+def rank_results(results):
+    """Healthy endpoints first, fastest first."""
+    return sorted(results, key=lambda r: (not r["healthy"], r["rtt_ms"] if r["rtt_ms"] is not None else float("inf")))
+
+
+def rewrite_endpoint(config: str, endpoint: str):
+    """Point the config's [Peer] Endpoint at the server that was probed."""
+    return re.sub(r"^Endpoint\s*=.*$", f"Endpoint = {endpoint}", config, flags=re.M)
+
+
+def probe_endpoints(endpoints, deadline: float = 2.0, verify_tls: bool = False):
+    """Probe all endpoints concurrently; anything unfinished by `deadline` is unhealthy."""
+    if not endpoints:
+        return []
+    if len(endpoints) == 1:
+        # Nothing to choose between; the handshake check decides instead
+        return [{**endpoints[0], "rtt_ms": None, "healthy": True}]
+
+    executor = ThreadPoolExecutor(max_workers=min(16, len(endpoints)))
+    futures = {executor.submit(probe_endpoint, ep, deadline, verify_tls): ep for ep in endpoints}
+    done, _ = wait(futures, timeout=deadline)
+    # Do not wait for stragglers; their sockets time out on their own
+    executor.shutdown(wait=False)
+
+    results = []
+    for future, endpoint in futures.items():
+        if future in done and future.exception() is None:
+            results.append(future.result())
+        else:
+            results.append({**endpoint, "rtt_ms": None, "healthy": False})
+    return rank_results(results)
+
+
+class EndpointSelector:
+    """Caches probe results per server for `ttl` seconds."""
+
+    def __init__(self, ttl: float = 300, deadline: float = 2.0, verify_tls: bool = False):
+        self.ttl = ttl
+        self.deadline = deadline
+        self.verify_tls = verify_tls
+        self._cache = {}
+
+    def rank(self, api_client, force: bool = False):
+        """Return endpoints ranked by health and latency for this server."""
+        cached = self._cache.get(api_client.base_url)
+        if cached and not force and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+
+        try:
+            endpoints = api_client.get_endpoints()
+        except Exception:
+            endpoints = []
+        if not endpoints:
+            # Older servers do not publish a list; use the configured one as-is
+            return [{"name": "configured", "url": api_client.base_url, "wireguard": None,
+                     "rtt_ms": None, "healthy": True}]
+
+        results = probe_endpoints(endpoints, self.deadline, self.verify_tls)
+        self._cache[api_client.base_url] = (time.monotonic(), results)
+        return results
+
+    def mark_failed(self, base_url: str, name: str):
+        """Demote an endpoint whose tunnel never completed a handshake."""
+        cached = self._cache.get(base_url)
+        if not cached:
+            return
+        results = [{**r, "healthy": False} if r["name"] == name else r for r in cached[1]]
+        self._cache[base_url] = (cached[0], rank_results(results))
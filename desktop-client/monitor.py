@@ -0,0 +1,182 @@
+import platform
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+
+SYSFS_NET = Path("/sys/class/net")
+WINDOWS_WG_EXE = r"C:\Program Files\WireGuard\wg.exe"
+
+
+def _wg_command():
+    return WINDOWS_WG_EXE if platform.system() == "Windows" else "wg"
+
+
+def read_sysfs_counters(interface: str):
+    """Return (rx_bytes, tx_bytes) from sysfs, or None if unavailable."""
+    stats = SYSFS_NET / interface / "statistics"
+    try:
+        rx = int((stats / "rx_bytes").read_text())
+        tx = int((stats / "tx_bytes").read_text())
+    except (OSError, ValueError):
+        return None
+    return rx, tx
+
+
+def parse_wg_dump(text: str):
+    """Parse `wg show <iface> dump` into (rx_bytes, tx_bytes, latest_handshake).
+
+    The first line describes the interface; each following line is a peer:
+    public-key, preshared-key, endpoint, allowed-ips, latest-handshake,
+    transfer-rx, transfer-tx, persistent-keepalive.
+    """
+    rx = tx = latest = 0
+    for line in text.splitlines()[1:]:
+        fields = line.split("\t")
+        if len(fields) < 8:
+            continue
+        try:
+            latest = max(latest, int(fields[4]))
+            rx += int(fields[5])
+            tx += int(fields[6])
+        except ValueError:
+            continue
+    return rx, tx, latest
+
+
+def read_wg_dump(interface: str):
+    """Run `wg show <iface> dump`; returns parsed tuple or None."""
+    try:
+        result = subprocess.run(
+            [_wg_command(), "show", interface, "dump"],
+            capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return parse_wg_dump(result.stdout)
+
+
+def format_rate(bytes_per_sec: float):
+    for unit in ("B/s", "KB/s", "MB/s", "GB/s"):
+        if bytes_per_sec < 1024 or unit == "GB/s":
+            return f"{bytes_per_sec:.1f} {unit}"
+        bytes_per_sec /= 1024
+
+
+def format_age(seconds):
+    if seconds is None:
+        return "never"
+    if seconds < 60:
+        return f"{int(seconds)}s ago"
+    if seconds < 3600:
+        return f"{int(seconds // 60)}m {int(seconds % 60)}s ago"
+    return f"{int(seconds // 3600)}h ago"
+
+
+class TunnelMonitor:
+    """Background sampler for tunnel throughput and handshake age.
+
+    Counters come from sysfs where available (a couple of small file reads),
+    and `wg show dump` is only spawned for the handshake time at a slower
+    rate, or for everything on platforms without sysfs. While the tunnel is
+    down the monitor polls at `idle_interval` and only reports state changes.
+    `on_sample` is called from the monitor thread with a dict.
+    """
+
+    def __init__(self, on_sample, interface: str = "wg0", interval: float = 1.0,
+                 idle_interval: float = 5.0, handshake_interval: float = 5.0):
+        self.on_sample = on_sample
+        self.interface = interface
+        self.interval = interval
+        self.idle_interval = idle_interval
+        self.handshake_interval = handshake_interval
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._handshake = 0
+        self._handshake_checked = 0.0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stop sampling; with a timeout, wait for the thread to exit."""
+        self._stop.set()
+        self._wake.set()
+        if timeout is not None and self._thread:
+            self._thread.join(timeout)
+
+    def set_interval(self, seconds: float):
+        self.interval = max(0.1, seconds)
+        self._wake.set()
+
+    def _read(self, now):
+        counters = read_sysfs_counters(self.interface)
+        if counters is None:
+            if SYSFS_NET.is_dir():
+                # sysfs exists but has no such interface: the tunnel is down,
+                # no need to spawn wg to confirm it
+                return None
+            dump = read_wg_dump(self.interface)
+            if dump is None:
+                return None
+            self._handshake = dump[2]
+            self._handshake_checked = now
+            return dump[0], dump[1]
+
+        if now - self._handshake_checked >= self.handshake_interval:
+            dump = read_wg_dump(self.interface)
+            if dump is not None:
+                self._handshake = dump[2]
+            self._handshake_checked = now
+        return counters
+
+    def _loop(self):
+        previous = None
+        was_connected = None
+
+        while not self._stop.is_set():
+            # Clear before sampling so a set_interval() during the read still wakes us
+            self._wake.clear()
+            now = time.monotonic()
+            counters = self._read(now)
+            connected = counters is not None
+
+            if connected:
+                rx_rate = tx_rate = 0.0
+                if previous is not None:
+                    elapsed = now - previous[0]
+                    if elapsed > 0:
+                        # Counters reset when the interface is recreated
+                        rx_rate = max(0, counters[0] - previous[1]) / elapsed
+                        tx_rate = max(0, counters[1] - previous[2]) / elapsed
+                previous = (now, counters[0], counters[1])
+
+                handshake_age = time.time() - self._handshake if self._handshake else None
+                self.on_sample({
+                    "connected": True,
+                    "rx_bytes": counters[0],
+                    "tx_bytes": counters[1],
+                    "rx_rate": rx_rate,
+                    "tx_rate": tx_rate,
+                    "handshake_age": handshake_age,
+                })
+            else:
+                previous = None
+                self._handshake = 0
+                self._handshake_checked = 0.0
+                if was_connected is not False:
+                    self.on_sample({"connected": False})
+            was_connected = connected
+
+            if self._stop.is_set():
+                break
+            self._wake.wait(self.interval if connected else self.idle_interval)
@@ -39,3 +39,12 @@ class VPNApiClient:
         if "config" not in payload:
             raise RuntimeError("Server did not return a WireGuard config")
         return payload
+
+    def get_endpoints(self):
+        response = self.session.get(
+            f"{self.base_url}/api/endpoints",
+            timeout=10,
+        )
+        if response.status_code != 200:
+            raise RuntimeError("Endpoint list not available")
+        return response.json().get("endpoints", [])
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+VPN Cloud Project - IP Pool Multi-Process Check
+Runs N processes allocating addresses through IPPool against a real MySQL,
+asserts that no address is assigned twice, and reports throughput as the
+process count grows
+"""
+
+import argparse
+import ipaddress
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import pymysql
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "webui" / "src"))
+from ip_pool import IPPool  # noqa: E402
+
+BENCH_USER = "ip-pool-bench"
+
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', '127.0.0.1'),
+    'port': int(os.getenv('DB_PORT', '3306')),
+    'user': os.getenv('DB_USER', 'vpn_api'),
+    'password': os.getenv('DB_PASSWORD', 'vpn_api_pass_456'),
+    'database': os.getenv('DB_NAME', 'vpn_users'),
+    'charset': 'utf8mb4',
+    'cursorclass': pymysql.cursors.DictCursor
+}
+
+
+def get_db_connection():
+    return pymysql.connect(**DB_CONFIG)
+
+
+def make_pool(args):
+    return IPPool(get_db_connection, subnet=args.subnet, block_size=args.block_size)
+
+
+def bench_user_id():
+    """Disabled throwaway user that owns every benchmark connection"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """INSERT INTO vpn_users (username, password_hash, enabled)
+                   VALUES (%s, SHA2(%s, 256), FALSE)
+                   ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)""",
+                (BENCH_USER, uuid.uuid4().hex)
+            )
+            conn.commit()
+            return cursor.lastrowid
+    finally:
+        conn.close()
+
+
+def reset(args, user_id):
+    """Drop connections and blocks left by a previous round"""
+    pool = make_pool(args)
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM active_connections WHERE user_id = %s", (user_id,))
+            cursor.execute(
+                "DELETE FROM ip_pool_blocks WHERE block_start BETWEEN %s AND %s",
+                (pool.first_host, pool.last_host)
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def worker(args, user_id, barrier, results):
+    """One webui node: warm up, wait for the others, then allocate"""
+    pool = make_pool(args)
+    pool.start()
+    conn = get_db_connection()
+    assigned = []
+    try:
+        barrier.wait()
+        started = time.time()
+        for i in range(args.allocations):
+            assigned.append(pool.assign(conn, user_id, f"bench-{os.getpid()}-{i}"))
+        finished = time.time()
+    finally:
+        conn.close()
+        pool.close()
+    results.put((started, finished, assigned))
+
+
+def run_round(args, user_id, processes):
+    reset(args, user_id)
+
+    ctx = multiprocessing.get_context('spawn')
+    barrier = ctx.Barrier(processes)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(args, user_id, barrier, results))
+             for _ in range(processes)]
+    for proc in procs:
+        proc.start()
+    outcomes = [results.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+        assert proc.exitcode == 0, f"worker exited with {proc.exitcode}"
+
+    elapsed = max(o[1] for o in outcomes) - min(o[0] for o in outcomes)
+    assigned = [ip for o in outcomes for ip in o[2]]
+    return elapsed, assigned
+
+
+def verify(args, user_id, assigned):
+    """No address handed out twice, all recorded, all blocks returned"""
+    assert len(assigned) == len(set(assigned)), "an address was assigned twice"
+
+    network = ipaddress.ip_network(args.subnet)
+    assert all(ipaddress.ip_address(ip) in network for ip in assigned)
+
+    pool = make_pool(args)
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) AS total FROM active_connections WHERE user_id = %s",
+                (user_id,)
+            )
+            assert cursor.fetchone()['total'] == len(assigned), "rows do not match allocations"
+
+            cursor.execute(
+                """SELECT COUNT(*) AS held FROM ip_pool_blocks
+                   WHERE owner IS NOT NULL AND block_start BETWEEN %s AND %s""",
+                (pool.first_host, pool.last_host)
+            )
+            assert cursor.fetchone()['held'] == 0, "blocks still leased after shutdown"
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-process IP pool allocation check')
+    parser.add_argument('--processes', default='1,2,4,8',
+                        help='Comma separated process counts (default: 1,2,4,8)')
+    parser.add_argument('--allocations', type=int, default=200,
+                        help='Allocations per process')
+    parser.add_argument('--subnet', default='10.250.0.0/16',
+                        help='Scratch subnet, kept apart from the live pool')
+    parser.add_argument('--block-size', type=int, default=16, help='Addresses per block')
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.processes.split(',')]
+    user_id = bench_user_id()
+    baseline = None
+
+    try:
+        print(f"{'procs':>5} {'allocs':>7} {'seconds':>8} {'allocs/s':>9} {'speedup':>8}")
+        for processes in counts:
+            elapsed, assigned = run_round(args, user_id, processes)
+            verify(args, user_id, assigned)
+
+            rate = len(assigned) / elapsed if elapsed > 0 else float('inf')
+            baseline = baseline or rate
+            print(f"{processes:>5} {len(assigned):>7} {elapsed:>8.2f} {rate:>9.0f} "
+                  f"{rate / baseline:>7.2f}x")
+        print("✓ No duplicate assignments")
+    finally:
+        reset(args, user_id)
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM vpn_users WHERE id = %s", (user_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+VPN Cloud Project - Web UI Startup Benchmark
+Starts the production server and reports how long it takes until
+/api/ready answers, plus the startup figure the worker measured itself
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+WEBUI_DIR = Path(__file__).resolve().parent.parent / "webui"
+
+
+def wait_ready(url, timeout):
+    """Poll the readiness endpoint; returns its JSON body or None"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                return json.load(response)
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.05)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure web UI time-to-ready')
+    parser.add_argument('--port', type=int, default=5099, help='Port to bind')
+    parser.add_argument('--runs', type=int, default=3, help='Number of cold starts')
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds to wait for readiness')
+    args = parser.parse_args()
+
+    env = {**os.environ, 'PORT': str(args.port)}
+    url = f"http://127.0.0.1:{args.port}/api/ready"
+
+    for run in range(1, args.runs + 1):
+        started = time.perf_counter()
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py'],
+            cwd=WEBUI_DIR, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            body = wait_ready(url, args.timeout)
+            elapsed = (time.perf_counter() - started) * 1000
+        finally:
+            server.terminate()
+            server.wait()
+
+        if body is None:
+            print(f"run {run}: not ready after {args.timeout}s (is the database reachable?)")
+            sys.exit(1)
+        print(f"run {run}: ready in {elapsed:.1f} ms "
+              f"(worker startup {body['startup_ms']} ms, warm-up {body['warmup_ms']} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+VPN Cloud Project - Endpoint Probe Check
+Starts local stand-in servers (HTTP health endpoints plus UDP sockets) and
+checks that the CLI and desktop clients rank them, honour the probe
+deadline, fall back to the configured URL and rewrite the tunnel Endpoint
+"""
+
+import json
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR / "desktop-client"))
+sys.path.insert(0, str(PROJECT_DIR / "client"))
+
+import requests  # noqa: E402
+
+import endpoints as desktop  # noqa: E402
+import wg_connect as cli  # noqa: E402
+from vpn_api import VPNApiClient  # noqa: E402
+
+DEADLINE = 1.0
+
+
+def start_server(delay, published):
+    """Stand-in webui: /api/health after `delay`, /api/endpoints from `published`"""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == '/api/endpoints':
+                body = {'success': True, 'endpoints': published}
+            else:
+                time.sleep(delay)
+                body = {'success': True, 'status': 'ok'}
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def udp_port(listening):
+    """A silent UDP listener (like WireGuard), or a closed port"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    if not listening:
+        sock.close()
+    else:
+        udp_port.keep.append(sock)
+    return port
+
+
+udp_port.keep = []
+
+
+def names(results, healthy=True):
+    return [r['name'] for r in results if r['healthy'] == healthy]
+
+
+def main():
+    published = []
+    open_udp, closed_udp = udp_port(True), udp_port(False)
+    published += [
+        {'name': 'slow', 'url': start_server(0.3, published), 'wireguard': f'127.0.0.1:{open_udp}'},
+        {'name': 'fast', 'url': start_server(0.0, published), 'wireguard': f'127.0.0.1:{open_udp}'},
+        {'name': 'udp-closed', 'url': start_server(0.0, published), 'wireguard': f'127.0.0.1:{closed_udp}'},
+        {'name': 'hung', 'url': start_server(10, published), 'wireguard': f'127.0.0.1:{open_udp}'},
+        {'name': 'down', 'url': 'http://127.0.0.1:1', 'wireguard': f'127.0.0.1:{open_udp}'},
+    ]
+    entry = published[0]['url']
+
+    # Desktop client
+    selector = desktop.EndpointSelector(deadline=DEADLINE)
+    started = time.monotonic()
+    ranked = selector.rank(VPNApiClient(entry))
+    elapsed = time.monotonic() - started
+    assert names(ranked) == ['fast', 'slow'], ranked
+    assert sorted(names(ranked, False)) == ['down', 'hung', 'udp-closed'], ranked
+    assert elapsed < DEADLINE + 1, f"probing took {elapsed:.2f}s"
+    selector.mark_failed(entry, 'fast')
+    assert names(selector.rank(VPNApiClient(entry))) == ['slow']
+    print(f"✓ desktop: ranked {names(ranked)} in {elapsed:.2f}s")
+
+    # CLI client, with its cache in a scratch directory
+    cli.CONFIG_DIR = Path(tempfile.mkdtemp())
+    cli.ENDPOINT_CACHE_FILE = cli.CONFIG_DIR / "endpoints.json"
+    cli.PROBE_DEADLINE = DEADLINE
+    session = requests.Session()
+    ranked = cli.select_endpoints(session, f"{entry}/api")
+    assert names(ranked) == ['fast', 'slow'], ranked
+    assert ranked[0]['api_url'] == f"{published[1]['url']}/api"
+    assert cli.select_endpoints(session, f"{entry}/api") == ranked, "cache not used"
+    print(f"✓ cli: ranked {names(ranked)}")
+
+    # A single published server is used without probing, even if unresolvable
+    single = [{'name': 'only', 'url': 'http://unused.invalid', 'wireguard': 'vpn.invalid:51820'}]
+    started = time.monotonic()
+    assert names(desktop.probe_endpoints(single)) == ['only']
+    assert names(cli.probe_endpoints(single)) == ['only']
+    assert time.monotonic() - started < 0.1
+    print("✓ single server: no probing")
+
+    # Servers that publish nothing keep clients on the configured URL
+    bare = start_server(0.0, [])
+    assert desktop.EndpointSelector().rank(VPNApiClient(bare))[0]['url'] == bare
+    assert cli.select_endpoints(session, f"{bare}/api", refresh=True)[0]['api_url'] == f"{bare}/api"
+    print("✓ no endpoint list: configured URL")
+
+    config = "[Interface]\nAddress = 10.13.13.2/32\n\n[Peer]\nEndpoint = YOUR_SERVER_IP:51820\n"
+    for rewrite in (desktop.rewrite_endpoint, cli.rewrite_endpoint):
+        assert "Endpoint = 127.0.0.1:5000\n" in rewrite(config, "127.0.0.1:5000")
+    print("✓ Endpoint rewritten to the probed server")
+
+
+if __name__ == '__main__':
+    main()
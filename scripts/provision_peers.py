@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+VPN Cloud Project - Offline Peer Provisioning
+Compiles a large peer set into one SQLite peer database and a single
+WireGuard server config, instead of one key directory per peer
+"""
+
+import argparse
+import base64
+import hashlib
+import ipaddress
+import os
+import sqlite3
+import sys
+import tempfile
+from multiprocessing import Pool
+from pathlib import Path
+
+try:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+except ImportError:
+    X25519PrivateKey = None
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CONFIG_DIR = PROJECT_DIR / "wireguard"
+
+POST_UP = ("iptables -A FORWARD -i %i -j ACCEPT; iptables -A FORWARD -o %i -j ACCEPT; "
+           "iptables -t nat -A POSTROUTING -o eth+ -j MASQUERADE")
+POST_DOWN = ("iptables -D FORWARD -i %i -j ACCEPT; iptables -D FORWARD -o %i -j ACCEPT; "
+             "iptables -t nat -D POSTROUTING -o eth+ -j MASQUERADE")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS peers (
+    name TEXT PRIMARY KEY,
+    address TEXT UNIQUE NOT NULL,
+    private_key TEXT NOT NULL,
+    public_key TEXT NOT NULL,
+    preshared_key TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def print_info(msg):
+    print(f"ℹ {msg}")
+
+
+def print_success(msg):
+    print(f"✓ {msg}")
+
+
+def print_error(msg):
+    print(f"✗ {msg}", file=sys.stderr)
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode()
+
+
+def generate_keys(count):
+    """Generate `count` (private, public, preshared) key triples"""
+    keys = []
+    for _ in range(count):
+        private = X25519PrivateKey.generate()
+        private_raw = private.private_bytes(
+            serialization.Encoding.Raw,
+            serialization.PrivateFormat.Raw,
+            serialization.NoEncryption()
+        )
+        public_raw = private.public_key().public_bytes(
+            serialization.Encoding.Raw,
+            serialization.PublicFormat.Raw
+        )
+        keys.append((_b64(private_raw), _b64(public_raw), _b64(os.urandom(32))))
+    return keys
+
+
+def generate_keys_parallel(count, jobs):
+    """Spread key generation over `jobs` processes"""
+    if count == 0:
+        return []
+    if jobs <= 1 or count < 256:
+        return generate_keys(count)
+
+    chunk = -(-count // (jobs * 4))
+    sizes = [min(chunk, count - start) for start in range(0, count, chunk)]
+    with Pool(jobs) as pool:
+        batches = pool.map(generate_keys, sizes)
+    return [key for batch in batches for key in batch]
+
+
+def open_db(path):
+    """Open (and create if needed) the peer database"""
+    db = sqlite3.connect(path)
+    os.chmod(path, 0o600)
+    db.executescript(SCHEMA)
+    return db
+
+
+def get_meta(db, key, default=None):
+    row = db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_meta(db, key, value):
+    db.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, str(value))
+    )
+
+
+def load_server_keys(config_dir):
+    """Reuse the server keypair, creating one on first run"""
+    server_dir = config_dir / "server"
+    private_path = server_dir / "privatekey-server"
+    public_path = server_dir / "publickey-server"
+
+    if private_path.exists() and public_path.exists():
+        return private_path.read_text().strip(), public_path.read_text().strip()
+
+    private_key, public_key, _ = generate_keys(1)[0]
+    write_atomic(private_path, private_key + "\n")
+    write_atomic(public_path, public_key + "\n")
+    return private_key, public_key
+
+
+def desired_peers(args):
+    """Peer names requested on the command line, in order"""
+    if args.peers_file:
+        names = []
+        for line in Path(args.peers_file).read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith('#'):
+                names.append(line)
+        return names
+    return [f"peer{i}" for i in range(1, args.peers + 1)]
+
+
+def free_addresses(network, used):
+    """Yield unused host addresses, skipping the server's .1"""
+    hosts = network.hosts()
+    next(hosts, None)
+    for host in hosts:
+        ip = str(host)
+        if ip not in used:
+            yield ip
+
+
+def write_atomic(path, content):
+    """Replace `path` with `content` without exposing a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def render_server_config(db, server_private_key, network, port):
+    """Render wg0.conf for every peer in the database"""
+    server_ip = next(network.hosts())
+    parts = [
+        "[Interface]\n"
+        f"Address = {server_ip}/{network.prefixlen}\n"
+        f"ListenPort = {port}\n"
+        f"PrivateKey = {server_private_key}\n"
+        f"PostUp = {POST_UP}\n"
+        f"PostDown = {POST_DOWN}\n"
+    ]
+    rows = db.execute(
+        "SELECT name, public_key, preshared_key, address FROM peers ORDER BY rowid"
+    )
+    for name, public_key, preshared_key, address in rows:
+        parts.append(
+            f"\n[Peer]\n# {name}\n"
+            f"PublicKey = {public_key}\n"
+            f"PresharedKey = {preshared_key}\n"
+            f"AllowedIPs = {address}/32\n"
+        )
+    return "".join(parts)
+
+
+def render_client_config(db, name):
+    """Render a single client config from the peer database"""
+    row = db.execute(
+        "SELECT private_key, preshared_key, address FROM peers WHERE name = ?",
+        (name,)
+    ).fetchone()
+    if not row:
+        return None
+    private_key, preshared_key, address = row
+
+    return f"""[Interface]
+PrivateKey = {private_key}
+Address = {address}/32
+DNS = {get_meta(db, 'dns', '1.1.1.1')}
+
+[Peer]
+PublicKey = {get_meta(db, 'server_public_key')}
+PresharedKey = {preshared_key}
+Endpoint = {get_meta(db, 'endpoint')}
+AllowedIPs = {get_meta(db, 'allowed_ips', '0.0.0.0/0')}
+PersistentKeepalive = 25
+"""
+
+
+def compile_peers(args):
+    """Sync the peer database with the requested peers and render wg0.conf"""
+    if X25519PrivateKey is None:
+        print_error("The 'cryptography' package is required")
+        print_info("Install with: pip install cryptography")
+        sys.exit(1)
+
+    config_dir = Path(args.config_dir)
+    network = ipaddress.ip_network(args.subnet)
+    names = desired_peers(args)
+    if len(names) != len(set(names)):
+        print_error("Peer names must be unique")
+        sys.exit(1)
+
+    # Server address plus one per peer must fit in the subnet
+    if len(names) + 1 > network.num_addresses - 2:
+        print_error(f"{len(names)} peers do not fit in {network}")
+        sys.exit(1)
+
+    config_dir.mkdir(parents=True, exist_ok=True)
+    db = open_db(config_dir / "peers.db")
+    server_private_key, server_public_key = load_server_keys(config_dir)
+
+    if get_meta(db, 'subnet', args.subnet) != args.subnet:
+        print_error(f"Database was compiled for {get_meta(db, 'subnet')}; "
+                    "remove peers.db to renumber")
+        sys.exit(1)
+
+    existing = {
+        name: address
+        for name, address in db.execute("SELECT name, address FROM peers")
+    }
+    wanted = set(names)
+    removed = [name for name in existing if name not in wanted]
+    rotated = [name for name in args.rotate if name in existing and name in wanted]
+    added = [name for name in names if name not in existing]
+
+    with db:
+        db.executemany("DELETE FROM peers WHERE name = ?", [(n,) for n in removed])
+
+        keys = generate_keys_parallel(len(added) + len(rotated), args.jobs)
+        added_keys, rotated_keys = keys[:len(added)], keys[len(added):]
+
+        db.executemany(
+            "UPDATE peers SET private_key = ?, public_key = ?, preshared_key = ? "
+            "WHERE name = ?",
+            [(*key, name) for name, key in zip(rotated, rotated_keys)]
+        )
+
+        used = {address for name, address in existing.items() if name in wanted}
+        addresses = free_addresses(network, used)
+        db.executemany(
+            "INSERT INTO peers (name, address, private_key, public_key, preshared_key) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(name, next(addresses), *key) for name, key in zip(added, added_keys)]
+        )
+
+        set_meta(db, 'subnet', args.subnet)
+        set_meta(db, 'server_public_key', server_public_key)
+        set_meta(db, 'endpoint', f"{args.endpoint}:{args.port}")
+        set_meta(db, 'dns', args.dns)
+        set_meta(db, 'allowed_ips', args.allowed_ips)
+
+    print_info(f"Peers: {len(added)} added, {len(rotated)} rotated, "
+               f"{len(removed)} removed, {len(wanted) - len(added) - len(rotated)} unchanged")
+
+    config = render_server_config(db, server_private_key, network, args.port)
+    digest = hashlib.sha256(config.encode()).hexdigest()
+    conf_path = config_dir / "wg_confs" / "wg0.conf"
+
+    if conf_path.exists() and get_meta(db, 'config_sha256') == digest:
+        print_success(f"{conf_path} is up to date")
+    else:
+        write_atomic(conf_path, config)
+        with db:
+            set_meta(db, 'config_sha256', digest)
+        print_success(f"Wrote {conf_path}")
+
+    db.close()
+
+
+def show_client(args):
+    """Print (or write) one peer's client config"""
+    db_path = Path(args.config_dir) / "peers.db"
+    if not db_path.exists():
+        print_error(f"No peer database at {db_path}; run 'compile' first")
+        sys.exit(1)
+
+    db = open_db(db_path)
+    config = render_client_config(db, args.name)
+    db.close()
+
+    if config is None:
+        print_error(f"Unknown peer: {args.name}")
+        sys.exit(1)
+
+    if args.output:
+        write_atomic(Path(args.output), config)
+        print_success(f"Client config written to {args.output}")
+    else:
+        print(config, end="")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='VPN Cloud Project - Peer Provisioning')
+    parser.add_argument('--config-dir', default=str(DEFAULT_CONFIG_DIR),
+                        help='WireGuard config directory (default: ./wireguard)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = subparsers.add_parser('compile', help='Sync peers and render wg0.conf')
+    source = compile_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--peers', type=int, help='Number of peers (named peer1..peerN)')
+    source.add_argument('--peers-file', help='File with one peer name per line')
+    compile_parser.add_argument('--subnet', default='10.13.13.0/24', help='Tunnel subnet')
+    compile_parser.add_argument('--endpoint', default=os.getenv('SERVERURL', 'YOUR_SERVER_IP'),
+                                help='Public server host for client configs')
+    compile_parser.add_argument('--port', type=int, default=51820, help='WireGuard listen port')
+    compile_parser.add_argument('--dns', default='1.1.1.1', help='DNS server for clients')
+    compile_parser.add_argument('--allowed-ips', default='0.0.0.0/0',
+                                help='AllowedIPs for client configs')
+    compile_parser.add_argument('--rotate', action='append', default=[], metavar='NAME',
+                                help='Regenerate keys for a peer (repeatable)')
+    compile_parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                                help='Key generation processes (default: all cores)')
+
+    client_parser = subparsers.add_parser('client', help='Render a client config on demand')
+    client_parser.add_argument('name', help='Peer name')
+    client_parser.add_argument('-o', '--output', help='Write to file instead of stdout')
+
+    args = parser.parse_args()
+
+    if args.command == 'compile':
+        compile_peers(args)
+    else:
+        show_client(args)
+
+
+if __name__ == '__main__':
+    main()
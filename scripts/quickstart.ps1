@@ -56,6 +56,15 @@ if (-not (Test-Path "certs/privkey.pem") -or -not (Test-Path "certs/fullchain.pe
     Write-Host "✓ SSL certificates already exist"
 }
 
+Write-Host ""
+Write-Host "Building static assets..."
+if (Get-Command python -ErrorAction SilentlyContinue) {
+    python webui/build_static.py | Out-Null
+    Write-Host "✓ Static assets built"
+} else {
+    Write-Host "⚠ python not found; nginx will fall back to the webui for static files"
+}
+
 Write-Host ""
 Write-Host "Building and starting containers..."
 docker compose up -d --build
@@ -39,6 +39,16 @@ else
 fi
 echo ""
 
+# Build fingerprinted static assets for nginx (same output as the webui image)
+echo "Building static assets..."
+if command -v python3 &> /dev/null; then
+    python3 webui/build_static.py > /dev/null
+    echo "✓ Static assets built"
+else
+    echo "⚠ python3 not found; nginx will fall back to the webui for static files"
+fi
+echo ""
+
 # Build and start containers
 echo "Building and starting Docker containers..."
 echo "This may take a few minutes on first run..."
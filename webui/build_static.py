@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+VPN Cloud Project - Static Asset Build
+Minifies and content-hashes static/ files into static/dist/, writes gzip
+and brotli siblings for nginx, and a manifest the templates read
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = Path(__file__).resolve().parent
+STATIC_DIR = BASE_DIR / "static"
+DIST_DIR = STATIC_DIR / "dist"
+MANIFEST_FILE = DIST_DIR / "manifest.json"
+
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+
+
+def minify_css(text):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    # Only after colons: a space before one is a descendant combinator
+    text = re.sub(r':\s+', ':', text)
+    text = text.replace(';}', '}')
+    return text.strip() + '\n'
+
+
+def minify_js(text):
+    """Conservative JS minify: drop comment-only lines and indentation.
+
+    Files with template literals are only trimmed at line ends, since
+    their inner whitespace is significant.
+    """
+    if '`' in text:
+        return '\n'.join(line.rstrip() for line in text.splitlines()) + '\n'
+
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('//'):
+            continue
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def source_files():
+    """Every file under static/ except previous build output"""
+    for path in sorted(STATIC_DIR.rglob('*')):
+        if path.is_file() and DIST_DIR not in path.parents:
+            yield path
+
+
+def write_compressed(path, data):
+    """Write .gz and .br siblings next to `path`"""
+    with open(f"{path}.gz", 'wb') as f:
+        # mtime=0 keeps the output reproducible between builds
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(f"{path}.br", 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+def build():
+    """Build static/dist/ and its manifest"""
+    if DIST_DIR.exists():
+        shutil.rmtree(DIST_DIR)
+    DIST_DIR.mkdir(parents=True)
+
+    manifest = {}
+    for path in source_files():
+        relative = path.relative_to(STATIC_DIR).as_posix()
+        data = path.read_bytes()
+
+        minify = MINIFIERS.get(path.suffix)
+        if minify:
+            data = minify(data.decode('utf-8')).encode('utf-8')
+
+        digest = hashlib.sha256(data).hexdigest()[:10]
+        hashed = Path(relative).with_name(f"{path.stem}.{digest}{path.suffix}").as_posix()
+        target = DIST_DIR / hashed
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+
+        if path.suffix in COMPRESSIBLE:
+            write_compressed(target, data)
+
+        manifest[relative] = f"dist/{hashed}"
+        print(f"✓ {relative} -> dist/{hashed} ({len(data)} bytes)")
+
+    tmp_manifest = MANIFEST_FILE.with_suffix('.json.tmp')
+    tmp_manifest.write_text(json.dumps(manifest, indent=2, sort_keys=True) + '\n')
+    os.replace(tmp_manifest, MANIFEST_FILE)
+
+    if brotli is None:
+        print("ℹ brotli not installed; skipped .br files (pip install Brotli)")
+    print(f"✓ Manifest written to {MANIFEST_FILE}")
+
+
+if __name__ == '__main__':
+    try:
+        build()
+    except OSError as e:
+        print(f"✗ Static build failed: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,37 @@
+"""
+VPN Cloud Project - Gunicorn Configuration
+Production entry point: the app is created once in the master (preload)
+and every forked worker warms up before taking traffic
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+# Capped: each worker that hands out configs holds its own IP block
+workers = int(os.getenv('GUNICORN_WORKERS', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+threads = int(os.getenv('GUNICORN_THREADS', '2'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+pythonpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+wsgi_app = 'app:create_app()'
+preload_app = True
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Start the worker's startup clock (the master preloaded the app long before)"""
+    from app import mark_process_started
+
+    mark_process_started()
+
+
+def post_worker_init(worker):
+    """Warm DB connection and IP pool in the worker (sockets do not survive fork)"""
+    from app import warm_up
+
+    try:
+        warm_up(worker.wsgi)
+    except Exception as e:
+        # Not fatal: /api/ready keeps reporting 503 and retries the warm-up
+        worker.log.warning(f"Warm-up failed, will retry on readiness check: {e}")
@@ -4,21 +4,26 @@ VPN Cloud Project - Main Flask Application
 Handles authentication, user management, and WireGuard configuration
 """
 
-from flask import Flask, render_template, request, jsonify, session
+import time
+
+PROCESS_STARTED = time.perf_counter()
+
+from flask import Blueprint, Flask, current_app, render_template, request, jsonify, session
 from flask_cors import CORS
 import pymysql
 import hashlib
+import json
 import os
 import subprocess
 from functools import wraps
+from ip_pool import IPPool, PoolExhausted
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 TEMPLATE_DIR = os.path.join(BASE_DIR, '..', 'templates')
 STATIC_DIR = os.path.join(BASE_DIR, '..', 'static')
+ASSET_MANIFEST = os.path.join(STATIC_DIR, 'dist', 'manifest.json')
 
-app = Flask(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
-CORS(app)
+bp = Blueprint('main', __name__)
 
 # Database configuration
 DB_CONFIG = {
@@ -34,6 +39,29 @@ def get_db_connection():
     """Create database connection"""
     return pymysql.connect(**DB_CONFIG)
 
+# Tunnel addresses are served from blocks leased per node, so replicas
+# behind a load balancer never contend on a single allocation query
+ip_pool = IPPool(
+    get_db_connection,
+    subnet=os.getenv('WIREGUARD_SUBNET', '10.13.13.0/24'),
+    block_size=int(os.getenv('IP_POOL_BLOCK_SIZE', '16')),
+    lease_seconds=int(os.getenv('IP_POOL_LEASE_SECONDS', '60')),
+    heartbeat_seconds=int(os.getenv('IP_POOL_HEARTBEAT_SECONDS', '20'))
+)
+
+def load_endpoints():
+    """Parse VPN_ENDPOINTS: comma separated name|api_url|wireguard_host:port"""
+    endpoints = []
+    for entry in os.getenv('VPN_ENDPOINTS', '').split(','):
+        parts = [part.strip() for part in entry.split('|')]
+        if len(parts) == 3 and all(parts):
+            endpoints.append({
+                'name': parts[0],
+                'url': parts[1].rstrip('/'),
+                'wireguard': parts[2]
+            })
+    return endpoints
+
 def hash_password(password):
     """Hash password using SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -47,18 +75,18 @@ def require_auth(f):
         return f(*args, **kwargs)
     return decorated_function
 
-@app.route('/')
+@bp.route('/')
 def index():
     """Home page"""
     return render_template('index.html')
 
-@app.route('/dashboard')
+@bp.route('/dashboard')
 @require_auth
 def dashboard():
     """User dashboard"""
     return render_template('dashboard.html')
 
-@app.route('/api/auth/login', methods=['POST'])
+@bp.route('/api/auth/login', methods=['POST'])
 def login():
     """User login endpoint"""
     conn = None
@@ -122,13 +150,13 @@ def login():
         if conn:
             conn.close()
 
-@app.route('/api/auth/logout', methods=['POST'])
+@bp.route('/api/auth/logout', methods=['POST'])
 def logout():
     """User logout"""
     session.clear()
     return jsonify({'success': True}), 200
 
-@app.route('/api/config/generate', methods=['POST'])
+@bp.route('/api/config/generate', methods=['POST'])
 @require_auth
 def generate_config():
     """Generate WireGuard configuration for user"""
@@ -143,34 +171,12 @@ def generate_config():
             input=private_key.encode()
         ).decode().strip()
 
-        # Assign IP address (simple allocation)
+        # Assign IP address from this node's leased block
         conn = get_db_connection()
-        with conn.cursor() as cursor:
-            # Get next available IP
-            cursor.execute(
-                """SELECT assigned_ip FROM active_connections 
-                   ORDER BY id DESC LIMIT 1"""
-            )
-            last_conn = cursor.fetchone()
-
-            if last_conn:
-                last_ip = last_conn['assigned_ip']
-                ip_parts = last_ip.split('.')
-                next_ip_last_octet = int(ip_parts[3]) + 1
-                if next_ip_last_octet > 254:
-                    return jsonify({'error': 'VPN IP pool exhausted'}), 409
-                next_ip = f"10.13.13.{next_ip_last_octet}"
-            else:
-                next_ip = "10.13.13.2"
-
-            # Store connection
-            cursor.execute(
-                """INSERT INTO active_connections 
-                   (user_id, public_key, assigned_ip) 
-                   VALUES (%s, %s, %s)""",
-                (user_id, public_key, next_ip)
-            )
-            conn.commit()
+        try:
+            next_ip = ip_pool.assign(conn, user_id, public_key)
+        except PoolExhausted:
+            return jsonify({'error': 'VPN IP pool exhausted'}), 409
 
         # Create WireGuard config
         server_public_key = os.getenv('WIREGUARD_PUBLIC_KEY', 'SERVER_PUBLIC_KEY_HERE')
@@ -202,7 +208,7 @@ PersistentKeepalive = 25
         if conn:
             conn.close()
 
-@app.route('/api/users/me', methods=['GET'])
+@bp.route('/api/users/me', methods=['GET'])
 @require_auth
 def get_current_user():
     """Get current user information"""
@@ -231,7 +237,7 @@ def get_current_user():
         if conn:
             conn.close()
 
-@app.route('/api/status', methods=['GET'])
+@bp.route('/api/status', methods=['GET'])
 def get_status():
     """Get VPN server status"""
     conn = None
@@ -258,10 +264,105 @@ def get_status():
         if conn:
             conn.close()
 
-@app.route('/api/health', methods=['GET'])
+@bp.route('/api/endpoints', methods=['GET'])
+def get_endpoints():
+    """List VPN servers clients can probe and choose from.
+
+    Empty unless VPN_ENDPOINTS is set, so single-server deployments keep
+    clients on the URL they were configured with.
+    """
+    return jsonify({'success': True, 'endpoints': load_endpoints()}), 200
+
+@bp.route('/api/health', methods=['GET'])
 def health():
     """Simple health endpoint"""
     return jsonify({'success': True, 'status': 'ok'}), 200
 
+@bp.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness endpoint: 503 until this worker has finished warming up"""
+    app = current_app._get_current_object()
+    if not app.config['READY']:
+        try:
+            warm_up(app)
+        except Exception as e:
+            print(f"Warm-up error: {e}")
+            return jsonify({'success': False, 'status': 'warming up'}), 503
+
+    return jsonify({
+        'success': True,
+        'status': 'ready',
+        'startup_ms': app.config['STARTUP_MS'],
+        'warmup_ms': app.config['WARMUP_MS']
+    }), 200
+
+def load_asset_manifest():
+    """Map static paths to fingerprinted build output (see build_static.py)"""
+    try:
+        with open(ASSET_MANIFEST) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        # Not built: fall back to the unversioned files
+        return {}
+    # Never link a hashed file that is not on disk
+    return {path: hashed for path, hashed in manifest.items()
+            if os.path.isfile(os.path.join(STATIC_DIR, hashed))}
+
+def create_app():
+    """Application factory"""
+    app = Flask(__name__, template_folder=TEMPLATE_DIR, static_folder=STATIC_DIR)
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+    app.config['READY'] = False
+    app.config['STARTUP_MS'] = None
+    app.config['WARMUP_MS'] = None
+    CORS(app)
+    app.register_blueprint(bp)
+
+    manifest = load_asset_manifest()
+
+    @app.context_processor
+    def asset_helpers():
+        def asset_url(path):
+            """Fingerprinted URL for a file under static/"""
+            return f"/static/{manifest.get(path, path)}"
+        return {'asset_url': asset_url}
+
+    # Compile templates up front; with a preloading server this happens once
+    # in the master and is shared by every forked worker
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+
+    return app
+
+def mark_process_started():
+    """Restart the startup clock; called in each forked worker so startup_ms
+    covers that worker rather than the preloading master"""
+    global PROCESS_STARTED
+    PROCESS_STARTED = time.perf_counter()
+
+def warm_up(app):
+    """Check the database and seed the IP pool before serving.
+
+    A full address pool does not make the worker unready: login and status
+    do not need an address, and generate_config reports it as a 409.
+    """
+    started = time.perf_counter()
+
+    conn = get_db_connection()
+    try:
+        conn.ping()
+    finally:
+        conn.close()
+
+    ip_pool.start()
+
+    finished = time.perf_counter()
+    app.config['WARMUP_MS'] = round((finished - started) * 1000, 1)
+    app.config['STARTUP_MS'] = round((finished - PROCESS_STARTED) * 1000, 1)
+    app.config['READY'] = True
+    print(f"Worker {os.getpid()} ready: startup {app.config['STARTUP_MS']} ms "
+          f"(warm-up {app.config['WARMUP_MS']} ms)")
+
 if __name__ == '__main__':
+    app = create_app()
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,353 @@
+"""
+VPN Cloud Project - IP Pool Leasing
+Serves tunnel addresses from blocks leased per webui node, so several
+replicas can allocate without racing on the active_connections table
+"""
+
+import atexit
+import ipaddress
+import os
+import random
+import socket
+import threading
+import uuid
+
+import pymysql
+
+# Also shipped as db/migrations/001_ip_pool.sql; created here so existing
+# deployments pick the table up without a manual migration
+BLOCKS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ip_pool_blocks (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    block_start INT UNSIGNED NOT NULL,
+    block_size INT NOT NULL,
+    owner VARCHAR(255) NULL,
+    claim_token CHAR(32) NULL,
+    lease_expires TIMESTAMP NULL,
+    UNIQUE KEY uniq_block_start (block_start),
+    UNIQUE KEY uniq_claim_token (claim_token)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+ASSIGN_ATTEMPTS = 5
+
+
+class PoolExhausted(Exception):
+    """Raised when every address in the subnet is assigned"""
+
+
+class PoolLayoutConflict(Exception):
+    """Raised when leased blocks still follow a different block size"""
+
+
+class IPPool:
+    """Lease address blocks from the database and hand them out locally"""
+
+    def __init__(self, connect, subnet='10.13.13.0/24', block_size=16,
+                 lease_seconds=60, heartbeat_seconds=20):
+        self.connect = connect
+        self.network = ipaddress.ip_network(subnet)
+        self.block_size = block_size
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+
+        # .0 is the network, .1 the server, the last address is broadcast
+        self.first_host = int(self.network.network_address) + 2
+        self.last_host = int(self.network.broadcast_address) - 1
+
+        self._lock = threading.Lock()
+        self._blocks = {}  # claim token -> free addresses in that block
+        self._pid = None
+        self._stop = None
+        self._atexit_registered = False
+        self.node_id = None
+
+    def _ensure_started(self):
+        """Set up per-process state; re-run after a fork so workers never
+        share the leases (or the heartbeat thread) of their parent.
+
+        The pid is only recorded once seeding succeeded and the heartbeat
+        runs, so a failed first attempt (database still booting) is retried
+        on the next call.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+
+        self._blocks = {}
+        self.node_id = f"{socket.gethostname()}:{pid}"
+        self._seed_blocks()
+
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+        self._stop = threading.Event()
+        thread = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        thread.start()
+        self._pid = pid
+
+    def start(self):
+        """Warm up: create and seed the block table for this process.
+
+        No block is leased here; workers lease on their first allocation,
+        so idle workers never pin addresses.
+        """
+        with self._lock:
+            self._ensure_started()
+
+    def _seed_blocks(self):
+        """Create the block table and rows for the configured subnet (idempotent).
+
+        Rows left by a different IP_POOL_BLOCK_SIZE would overlap the new
+        layout, so unleased ones are replaced. Blocks another node still
+        holds under the old layout make startup fail until they are
+        released or their lease expires.
+        """
+        rows = [
+            (start, min(self.block_size, self.last_host + 1 - start))
+            for start in range(self.first_host, self.last_host + 1, self.block_size)
+        ]
+        # Signed: block_start is unsigned and MySQL rejects negative results
+        mismatched = """block_start BETWEEN %s AND %s
+                        AND ((CAST(block_start AS SIGNED) - %s) %% %s != 0
+                             OR block_size != LEAST(%s, %s + 1 - CAST(block_start AS SIGNED)))"""
+        layout = (self.first_host, self.last_host, self.first_host, self.block_size,
+                  self.block_size, self.last_host)
+        conn = self.connect()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(BLOCKS_TABLE_SQL)
+                cursor.execute(
+                    f"""DELETE FROM ip_pool_blocks
+                        WHERE (owner IS NULL OR lease_expires < NOW())
+                          AND {mismatched}""",
+                    layout
+                )
+                cursor.execute(
+                    f"SELECT COUNT(*) AS held FROM ip_pool_blocks WHERE {mismatched}",
+                    layout
+                )
+                if cursor.fetchone()['held']:
+                    conn.rollback()
+                    raise PoolLayoutConflict(
+                        'IP pool blocks are still leased with a different block size'
+                    )
+                cursor.executemany(
+                    """INSERT IGNORE INTO ip_pool_blocks (block_start, block_size)
+                       VALUES (%s, %s)""",
+                    rows
+                )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _claim_block(self, conn):
+        """Atomically take over one unowned or expired block"""
+        token = uuid.uuid4().hex
+        with conn.cursor() as cursor:
+            # Single-statement claim: InnoDB row locks make this safe across
+            # replicas. Never-leased and least recently released blocks go
+            # first, so full blocks drift to the back of the queue.
+            cursor.execute(
+                """UPDATE ip_pool_blocks
+                   SET owner = %s, claim_token = %s,
+                       lease_expires = NOW() + INTERVAL %s SECOND
+                   WHERE (owner IS NULL OR lease_expires < NOW())
+                     AND block_start BETWEEN %s AND %s
+                   ORDER BY lease_expires IS NOT NULL, lease_expires, id
+                   LIMIT 1""",
+                (self.node_id, token, self.lease_seconds,
+                 self.first_host, self.last_host)
+            )
+            conn.commit()
+            if cursor.rowcount == 0:
+                return None, None
+
+            cursor.execute(
+                """SELECT id, block_start, block_size FROM ip_pool_blocks
+                   WHERE claim_token = %s""",
+                (token,)
+            )
+            block = cursor.fetchone()
+
+            addresses = [
+                str(ipaddress.ip_address(block['block_start'] + offset))
+                for offset in range(block['block_size'])
+            ]
+            placeholders = ', '.join(['%s'] * len(addresses))
+            cursor.execute(
+                f"""SELECT assigned_ip FROM active_connections
+                    WHERE assigned_ip IN ({placeholders})""",
+                addresses
+            )
+            used = {row['assigned_ip'] for row in cursor.fetchall()}
+
+        return token, [ip for ip in addresses if ip not in used]
+
+    def _release_block(self, conn, token):
+        """Give a block back to the shared pool"""
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """UPDATE ip_pool_blocks
+                   SET owner = NULL, claim_token = NULL, lease_expires = NOW()
+                   WHERE claim_token = %s""",
+                (token,)
+            )
+        conn.commit()
+
+    def allocate(self):
+        """Return a candidate address, leasing a new block when needed"""
+        with self._lock:
+            self._ensure_started()
+
+            for token, free in self._blocks.items():
+                if free:
+                    return self._take(token)
+
+            token = self._lease_block()
+            if token is not None:
+                return self._take(token)
+
+        # Every block is leased by other nodes: share their free addresses
+        return self._allocate_shared()
+
+    def _allocate_shared(self):
+        """Pick any unassigned address in the subnet.
+
+        Used when other nodes hold every block. An owner that later hands
+        out the same address hits uniq_assigned_ip and retries in assign(),
+        so sharing never produces duplicates. The pool only counts as full
+        when every address is actually assigned.
+        """
+        conn = self.connect()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT assigned_ip FROM active_connections")
+                used = {row['assigned_ip'] for row in cursor.fetchall()}
+        finally:
+            conn.close()
+
+        hosts = (str(ipaddress.ip_address(host))
+                 for host in range(self.first_host, self.last_host + 1))
+        free = [ip for ip in hosts if ip not in used]
+        if not free:
+            raise PoolExhausted('VPN IP pool exhausted')
+        # Random pick keeps concurrent fallbacks from colliding on one address
+        return random.choice(free)
+
+    def assign(self, conn, user_id, public_key):
+        """Allocate an address and record it in active_connections"""
+        with conn.cursor() as cursor:
+            for _ in range(ASSIGN_ATTEMPTS):
+                ip = self.allocate()
+                try:
+                    cursor.execute(
+                        """INSERT INTO active_connections 
+                           (user_id, public_key, assigned_ip) 
+                           VALUES (%s, %s, %s)""",
+                        (user_id, public_key, ip)
+                    )
+                    conn.commit()
+                    return ip
+                except pymysql.err.IntegrityError:
+                    # Taken by a shared allocation or after a lapsed lease
+                    conn.rollback()
+        raise PoolExhausted('Could not assign a free VPN IP')
+
+    def _lease_block(self):
+        """Claim a block with free addresses; returns its token or None"""
+        conn = self.connect()
+        try:
+            # Full blocks are handed straight back; give up once every
+            # block has been looked at
+            for _ in range(self._block_count()):
+                token, free = self._claim_block(conn)
+                if token is None:
+                    return None
+                if free:
+                    self._blocks[token] = free
+                    return token
+                self._release_block(conn, token)
+            return None
+        finally:
+            conn.close()
+
+    def _take(self, token):
+        """Pop an address; release the block once it has been used up"""
+        free = self._blocks[token]
+        ip = free.pop(0)
+        if not free:
+            del self._blocks[token]
+            conn = self.connect()
+            try:
+                self._release_block(conn, token)
+            finally:
+                conn.close()
+        return ip
+
+    def _block_count(self):
+        """Number of blocks the subnet is split into"""
+        return -(-(self.last_host + 1 - self.first_host) // self.block_size)
+
+    def _heartbeat_loop(self):
+        """Background thread renewing leases until close()"""
+        stop = self._stop
+        while not stop.wait(self.heartbeat_seconds):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"IP pool heartbeat error: {e}")
+
+    def heartbeat(self):
+        """Extend leases on held blocks and drop any that were lost"""
+        with self._lock:
+            if not self._blocks:
+                return
+            conn = self.connect()
+            try:
+                tokens = list(self._blocks)
+                placeholders = ', '.join(['%s'] * len(tokens))
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        f"""UPDATE ip_pool_blocks
+                            SET lease_expires = NOW() + INTERVAL %s SECOND
+                            WHERE owner = %s AND claim_token IN ({placeholders})""",
+                        (self.lease_seconds, self.node_id, *tokens)
+                    )
+                    # rowcount only counts changed rows (no CLIENT.FOUND_ROWS),
+                    # and a renewal within the claim's second changes nothing,
+                    # so confirm ownership explicitly
+                    cursor.execute(
+                        f"""SELECT claim_token FROM ip_pool_blocks
+                            WHERE owner = %s AND claim_token IN ({placeholders})""",
+                        (self.node_id, *tokens)
+                    )
+                    held = {row['claim_token'] for row in cursor.fetchall()}
+                conn.commit()
+                for token in tokens:
+                    if token not in held:
+                        # Lease expired and was claimed elsewhere
+                        del self._blocks[token]
+            finally:
+                conn.close()
+
+    def close(self):
+        """Stop the heartbeat and return unused blocks to the pool"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            if self._stop:
+                self._stop.set()
+            if not self._blocks:
+                return
+            try:
+                conn = self.connect()
+                try:
+                    for token in list(self._blocks):
+                        self._release_block(conn, token)
+                finally:
+                    conn.close()
+            except Exception as e:
+                print(f"IP pool release error: {e}")
+            self._blocks = {}